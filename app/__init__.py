@@ -3,6 +3,8 @@ from flask import Flask
 from flask_cors import CORS
 from flask_pymongo import PyMongo
 from config import Config
+from app.logging_config import configure_logging
+from app.compression import configure_compression
 from datetime import timedelta
 
 app = Flask(__name__)
@@ -11,12 +13,11 @@ app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
     
 CORS(app)
 mongo = PyMongo(app)
+configure_compression(app)
 
 # Initialize logger
-# Configure logging
-logging.basicConfig(level=logging.ERROR,  # Set to INFO or WARNING in production
-                    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
-                    handlers=[logging.StreamHandler()])
+# Configure structured logging, LOG_LEVEL defaults to ERROR (set to INFO or WARNING in production)
+log_listener = configure_logging(app)
 logger = logging.getLogger(__name__)
 
 from app import routes
@@ -0,0 +1,85 @@
+import gzip
+import os
+from bson import json_util
+from pymongo import ReplaceOne
+
+CHECKPOINT_ID = "events"
+
+
+class CollectionArchive:
+    """Moves archived events into the events_archive collection."""
+
+    def __init__(self, db):
+        self.collection = db.events_archive
+
+    def write(self, events):
+        # upserts so a batch repeated after a crash does not fail on duplicate ids
+        self.collection.bulk_write([ReplaceOne({"_id": event["_id"]}, event, upsert=True) for event in events])
+
+
+class NdjsonArchive:
+    """Writes archived events as gzip compressed NDJSON, one file per batch."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, events):
+        path = os.path.join(self.directory, f"events-{events[0]['_id']}.ndjson.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as archive_file:
+            for event in events:
+                archive_file.write(json_util.dumps(event) + "\n")
+
+
+def get_archive(db, target, directory):
+    if target == "collection":
+        return CollectionArchive(db)
+    if target == "ndjson":
+        return NdjsonArchive(directory)
+    raise Exception(f"Unknown archive target: {target}")
+
+
+def archive_batches(db, archive, query, cutoff, batch_size):
+    """Archives the events matching query in batches of ascending ids, checkpointing after each batch."""
+    archived = 0
+    while True:
+        events = list(db.events.find(query).sort("_id", 1).limit(batch_size))
+        if not events:
+            return archived
+        event_ids = [event["_id"] for event in events]
+
+        archive.write(events)
+        # drop the feedback references of the archived events from all children at once
+        db.children.update_many(
+            {"event_feedback": {"$in": event_ids}},
+            {"$pull": {"event_feedback": {"$in": event_ids}}}
+        )
+        db.events.delete_many({"_id": {"$in": event_ids}})
+
+        db.archive_checkpoints.replace_one(
+            {"_id": CHECKPOINT_ID},
+            {"_id": CHECKPOINT_ID, "cutoff": cutoff, "last_id": event_ids[-1]},
+            upsert=True
+        )
+        query["_id"] = {"$gt": event_ids[-1]}
+        archived += len(events)
+
+
+def archive_events(db, archive, cutoff, batch_size):
+    """Moves events dated before cutoff into the archive in batches, resuming from the last checkpoint.
+
+    An interrupted run is first finished with the cutoff stored in its checkpoint, then the given cutoff is
+    applied, so every event dated before it is archived in any case.
+    """
+    archived = 0
+    checkpoint = db.archive_checkpoints.find_one({"_id": CHECKPOINT_ID})
+    if checkpoint:
+        query = {"date": {"$lt": checkpoint["cutoff"]}, "_id": {"$gt": checkpoint["last_id"]}}
+        archived += archive_batches(db, archive, query, checkpoint["cutoff"], batch_size)
+
+    # event dates are stored as iso strings, which sort like the dates themselves
+    cutoff = cutoff.isoformat()
+    archived += archive_batches(db, archive, {"date": {"$lt": cutoff}}, cutoff, batch_size)
+
+    db.archive_checkpoints.delete_one({"_id": CHECKPOINT_ID})
+    return archived
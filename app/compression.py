@@ -0,0 +1,93 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain"}
+
+
+class GzipCompressor:
+    encoding = "gzip"
+
+    def __init__(self, level):
+        # wbits 31 writes a gzip header instead of a raw zlib stream
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def sync_flush(self):
+        # emits everything compressed so far without ending the stream
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    encoding = "br"
+
+    def __init__(self, level):
+        # brotli quality goes up to 11, gzip levels map to the same range
+        self.compressor = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def sync_flush(self):
+        return self.compressor.flush()
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+def choose_compressor(accept_encodings, level):
+    if brotli is not None and "br" in accept_encodings:
+        return BrotliCompressor(level)
+    if "gzip" in accept_encodings:
+        return GzipCompressor(level)
+    return None
+
+
+def compress(data, compressor):
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, compressor):
+    # flush each chunk so clients receive it right away instead of at the end of the stream
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.sync_flush()
+    yield compressor.flush()
+
+
+def configure_compression(app):
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    level = app.config['COMPRESS_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or "Content-Encoding" in response.headers):
+            return response
+
+        compressor = choose_compressor(request.accept_encodings, level)
+        response.vary.add("Accept-Encoding")
+        if compressor is None:
+            return response
+
+        if response.is_streamed:
+            # size is unknown up front, so streamed responses are always compressed chunk by chunk
+            response.response = compress_stream(response.iter_encoded(), compressor)
+            response.direct_passthrough = False
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, compressor))
+        response.headers["Content-Encoding"] = compressor.encoding
+        return response
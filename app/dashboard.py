@@ -0,0 +1,77 @@
+from bson.objectid import ObjectId
+
+
+def teacher_dashboard_pipeline(user_id):
+    """Aggregation on the teachers collection returning one document per assigned classroom."""
+    return [
+        {"$match": {"user_id": ObjectId(user_id)}},
+        {"$unwind": "$assigned_classrooms"},
+        # children store the classroom as "Group A", events only as "A"
+        {"$project": {
+            "_id": 0,
+            "group": "$assigned_classrooms",
+            "classroom": {"$replaceOne": {"input": "$assigned_classrooms", "find": "Group ", "replacement": ""}},
+        }},
+        {"$lookup": {
+            "from": "children",
+            "let": {"group": "$group"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$classroom", "$$group"]}}},
+                {"$project": {"_id": 1, "first_name": 1}},
+            ],
+            "as": "roster",
+        }},
+        {"$lookup": {
+            "from": "events",
+            "let": {"classroom": "$classroom"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$classroom", "$$classroom"]}}},
+                {"$project": {"_id": 1, "date": 1, "event_type": 1, "max_children_allowed": 1, "children_staying_home": 1}},
+            ],
+            "as": "events",
+        }},
+        {"$addFields": {"roster_size": {"$size": "$roster"}}},
+        {"$project": {
+            "classroom": 1,
+            "roster_size": 1,
+            "events": {"$map": {
+                "input": "$events",
+                "as": "event",
+                "in": {"$let": {
+                    # only roster children count, so the count and the names always agree
+                    "vars": {"staying_home": {"$filter": {
+                        "input": "$roster",
+                        "as": "child",
+                        "cond": {"$in": ["$$child._id", "$$event.children_staying_home"]},
+                    }}},
+                    "in": {
+                        "_id": {"$toString": "$$event._id"},
+                        "date": "$$event.date",
+                        "event_type": "$$event.event_type",
+                        "max_children_allowed": "$$event.max_children_allowed",
+                        "staying_home_count": {"$size": "$$staying_home"},
+                        # names are resolved from the roster instead of one lookup per child
+                        "children_staying_home": {"$map": {
+                            "input": "$$staying_home",
+                            "as": "child",
+                            "in": {"child_id": {"$toString": "$$child._id"}, "child_name": "$$child.first_name"},
+                        }},
+                        # free places left if every child not staying home attends, negative if over capacity,
+                        # None for closed classrooms where nobody attends
+                        "remaining_capacity": {"$cond": [
+                            {"$eq": ["$$event.event_type", "Classroom Closed"]},
+                            None,
+                            {"$subtract": [
+                                "$$event.max_children_allowed",
+                                {"$subtract": ["$roster_size", {"$size": "$$staying_home"}]},
+                            ]},
+                        ]},
+                    },
+                }},
+            }},
+        }},
+    ]
+
+
+def get_teacher_dashboard(db, user_id, session=None):
+    return list(db.teachers.aggregate(teacher_dashboard_pipeline(user_id), session=session))
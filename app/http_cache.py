@@ -0,0 +1,50 @@
+import hashlib
+from datetime import timezone
+from flask import request, make_response
+from app import app
+
+
+def to_http_date(timestamp):
+    # mongo returns naive utc datetimes, http dates have second precision
+    return timestamp.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def events_validators(db, classrooms, roster=(), session=None):
+    """ETag and Last-Modified of the event feed of the given classrooms.
+
+    Last-Modified is the newest updated_at. The ETag also covers the event ids and the roster, so deleted or
+    archived events and moved children change it even when none of the remaining events was updated.
+    """
+    events = sorted(
+        db.events.find({"classroom": {"$in": classrooms}}, {"_id": 1, "updated_at": 1}, session=session),
+        key=lambda event: event["_id"]
+    )
+    timestamps = [event["updated_at"] for event in events if event.get("updated_at")]
+    last_modified = to_http_date(max(timestamps)) if timestamps else None
+    etag = make_etag(list(classrooms), list(roster), [(event["_id"], event.get("updated_at")) for event in events])
+    return etag, last_modified
+
+
+def is_not_modified(etag):
+    """Only If-None-Match is honored, two changes within the second of a Last-Modified date would look unchanged."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def add_cache_headers(response, etag, last_modified):
+    # responses are per user, clients may keep them but have to revalidate with If-None-Match
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config['HTTP_CACHE_MAX_AGE']
+    response.cache_control.must_revalidate = True
+    # weak since the same etag is sent for the identity, gzip and br encodings of the response
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def not_modified_response(etag, last_modified):
+    return add_cache_headers(make_response("", 304), etag, last_modified)
@@ -0,0 +1,84 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+# only accept client supplied request ids that are safe to write into logs
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9\-]{1,64}')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "route": getattr(record, "route", None),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tags records with the request's correlation id and drops records of unsampled requests."""
+
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.correlation_id = g.get("correlation_id")
+        record.route = request.endpoint
+        # warnings and errors are always kept
+        return record.levelno >= logging.WARNING or g.get("log_sampled", True)
+
+
+class RequestQueueHandler(QueueHandler):
+    """Hands records to the listener thread, which does the JSON formatting and the I/O."""
+
+    def prepare(self, record):
+        # merge the arguments now since they may change after the request thread moves on
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(app):
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    queue_handler = RequestQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(app.config['LOG_LEVEL'])
+
+    listener.start()
+    atexit.register(listener.stop)
+
+    sample_rates = app.config['LOG_SAMPLE_RATES']
+
+    @app.before_request
+    def assign_correlation_id():
+        request_id = request.headers.get("X-Request-ID", "")
+        g.correlation_id = request_id if REQUEST_ID_PATTERN.fullmatch(request_id) else uuid.uuid4().hex
+        # decide once per request so a sampled request keeps all of its log lines
+        g.log_sampled = random.random() < sample_rates.get(request.endpoint, 1.0)
+
+    @app.after_request
+    def add_correlation_id_header(response):
+        if "correlation_id" in g:
+            response.headers["X-Request-ID"] = g.correlation_id
+        return response
+
+    return listener
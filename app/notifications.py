@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from firebase_admin import messaging
+
+# FCM accepts at most 500 messages per batch request
+FCM_BATCH_SIZE = 500
+
+
+class FirebaseMessagingBackend:
+    """Sends messages through the Firebase Admin SDK."""
+
+    def send(self, token, title, body):
+        message = messaging.Message(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            token=token,
+        )
+        return messaging.send(message)
+
+    def find_unregistered(self, tokens):
+        # dry run validates the tokens with FCM without delivering anything
+        unregistered = set()
+        for start in range(0, len(tokens), FCM_BATCH_SIZE):
+            batch = tokens[start:start + FCM_BATCH_SIZE]
+            response = messaging.send_each([messaging.Message(token=token) for token in batch], dry_run=True)
+            for token, result in zip(batch, response.responses):
+                if not result.success and isinstance(result.exception, messaging.UnregisteredError):
+                    unregistered.add(token)
+        return unregistered
+
+
+class FakeMessagingBackend:
+    """In-memory backend for tests, records sent messages instead of calling FCM."""
+
+    def __init__(self, unregistered_tokens=()):
+        self.unregistered_tokens = set(unregistered_tokens)
+        self.sent = []
+
+    def send(self, token, title, body):
+        if token in self.unregistered_tokens:
+            raise messaging.UnregisteredError("Requested entity was not found.")
+        self.sent.append({"token": token, "title": title, "body": body})
+        return f"fake-message-{len(self.sent)}"
+
+    def find_unregistered(self, tokens):
+        return {token for token in tokens if token in self.unregistered_tokens}
+
+
+MESSAGING_BACKENDS = {
+    "firebase": FirebaseMessagingBackend,
+    "fake": FakeMessagingBackend,
+}
+
+
+def get_messaging_backend(name):
+    if name not in MESSAGING_BACKENDS:
+        raise Exception(f"Unknown messaging backend: {name}")
+    return MESSAGING_BACKENDS[name]()
+
+
+def ensure_fcm_indexes(db):
+    # sparse, so users without any token are left out and audience queries only scan users with live tokens
+    db.users.create_index("fcm_tokens.token", sparse=True)
+    db.users.create_index("fcm_tokens.last_seen", sparse=True)
+
+
+def migrate_legacy_fcm_tokens(db, query=None):
+    """Moves the old single fcm_token field into fcm_tokens, so users who do not register again keep their device."""
+    now = datetime.now(timezone.utc)
+    query = dict(query or {}, fcm_token={"$exists": True})
+    for user in db.users.find(query, {"fcm_token": 1, "fcm_tokens.token": 1}):
+        known_tokens = {entry["token"] for entry in user.get("fcm_tokens", [])}
+        update = {"$unset": {"fcm_token": ""}}
+        if user["fcm_token"] and user["fcm_token"] not in known_tokens:
+            update["$push"] = {"fcm_tokens": {"token": user["fcm_token"], "last_seen": now}}
+        db.users.update_one({"_id": user["_id"]}, update)
+
+
+def store_fcm_token(db, firebase_uid, fcm_token):
+    migrate_legacy_fcm_tokens(db, {"firebase_uid": firebase_uid})
+    now = datetime.now(timezone.utc)
+    # a device belongs to one account at a time, stop notifying the previous user
+    db.users.update_many(
+        {"firebase_uid": {"$ne": firebase_uid}, "fcm_tokens.token": fcm_token},
+        {"$pull": {"fcm_tokens": {"token": fcm_token}}}
+    )
+    db.users.update_many({"firebase_uid": {"$ne": firebase_uid}, "fcm_token": fcm_token}, {"$unset": {"fcm_token": ""}})
+    # refresh last_seen if the device is already known
+    db.users.update_one(
+        {"firebase_uid": firebase_uid, "fcm_tokens.token": fcm_token},
+        {"$set": {"fcm_tokens.$.last_seen": now}}
+    )
+    # otherwise add the token, guarded in the same update so concurrent registrations cannot both push it
+    db.users.update_one(
+        {"firebase_uid": firebase_uid, "fcm_tokens.token": {"$ne": fcm_token}},
+        {"$push": {"fcm_tokens": {"token": fcm_token, "last_seen": now}}}
+    )
+
+
+def remove_fcm_tokens(db, fcm_tokens):
+    if not fcm_tokens:
+        return 0
+    result = db.users.update_many(
+        {"fcm_tokens.token": {"$in": list(fcm_tokens)}},
+        {"$pull": {"fcm_tokens": {"token": {"$in": list(fcm_tokens)}}}}
+    )
+    return result.modified_count
+
+
+def sweep_fcm_tokens(db, backend, max_age_days):
+    """Drops tokens not seen for max_age_days and tokens FCM reports as unregistered."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    migrate_legacy_fcm_tokens(db)
+
+    # remove stale tokens
+    stale = db.users.update_many(
+        {"fcm_tokens.last_seen": {"$lt": cutoff}},
+        {"$pull": {"fcm_tokens": {"last_seen": {"$lt": cutoff}}}}
+    )
+
+    # check the remaining tokens with FCM
+    live_tokens = [
+        entry["token"]
+        for user in db.users.find({"fcm_tokens.token": {"$exists": True}}, {"_id": 0, "fcm_tokens.token": 1})
+        for entry in user["fcm_tokens"]
+    ]
+    unregistered = backend.find_unregistered(live_tokens)
+    remove_fcm_tokens(db, unregistered)
+
+    # unset empty lists to keep those users out of the sparse index
+    db.users.update_many({"fcm_tokens": {"$size": 0}}, {"$unset": {"fcm_tokens": ""}})
+
+    return {"stale_users": stale.modified_count, "unregistered_tokens": len(unregistered)}
@@ -0,0 +1,104 @@
+import base64
+import time
+import bson
+from bson.timestamp import Timestamp
+from flask import g, request
+from itsdangerous import Signer
+from pymongo.read_preferences import SecondaryPreferred
+from app import app, mongo, logger
+
+# clients echo this header from their last response, so reads on secondaries see their own earlier writes
+CAUSAL_TOKEN_HEADER = "X-Causal-Token"
+# tokens are signed so clients cannot push sessions to forged cluster or operation times
+causal_token_signer = Signer(app.config['FLASK_SECRET_KEY'], salt="causal-token")
+# allowed clock difference between the app and the cluster for times in a token
+MAX_CLOCK_SKEW_SECONDS = 60
+
+
+def secondary_preferred(db, max_staleness_seconds):
+    """Same database, but reads go to a secondary that lags the primary by at most max_staleness_seconds."""
+    return db.with_options(read_preference=SecondaryPreferred(max_staleness=max_staleness_seconds))
+
+
+secondary_db = secondary_preferred(mongo.db, app.config['READ_MAX_STALENESS_SECONDS'])
+
+
+def read_db():
+    """Database handle for reads of the current route.
+
+    Routes in SECONDARY_READ_ROUTES read from secondaries, but only if the client sent a valid causal token,
+    without one the client's own earlier writes may not have reached the secondary yet.
+    """
+    if request.endpoint in app.config['SECONDARY_READ_ROUTES'] and request_causal_token() is not None:
+        return secondary_db
+    return mongo.db
+
+
+def encode_causal_token(session):
+    if session.operation_time is None:
+        return None
+    token = {"operation_time": session.operation_time, "cluster_time": session.cluster_time}
+    return causal_token_signer.sign(base64.urlsafe_b64encode(bson.encode(token))).decode()
+
+
+def is_valid_time(timestamp):
+    return isinstance(timestamp, Timestamp) and timestamp.time <= time.time() + MAX_CLOCK_SKEW_SECONDS
+
+
+def decode_causal_token(token):
+    """Returns the times of a causal token, None if it is not signed by us or its times are invalid."""
+    try:
+        token = bson.decode(base64.urlsafe_b64decode(causal_token_signer.unsign(token)))
+    except Exception:
+        return None
+    cluster_time = token.get("cluster_time")
+    if not is_valid_time(token.get("operation_time")):
+        return None
+    if cluster_time is not None and not (isinstance(cluster_time, dict) and is_valid_time(cluster_time.get("clusterTime"))):
+        return None
+    return token
+
+
+def advance_session(session, token):
+    if token.get("cluster_time") is not None:
+        session.advance_cluster_time(token["cluster_time"])
+    session.advance_operation_time(token["operation_time"])
+
+
+def request_causal_token():
+    """Decoded causal token sent with the current request, None if it is missing or invalid."""
+    if "causal_token" not in g:
+        g.causal_token = decode_causal_token(request.headers.get(CAUSAL_TOKEN_HEADER, ""))
+    return g.causal_token
+
+
+def causal_session():
+    """Causally consistent session of the current request, advanced to the client's causal token."""
+    if "causal_session" not in g:
+        session = mongo.cx.start_session(causal_consistency=True)
+        token = request_causal_token()
+        if token:
+            try:
+                advance_session(session, token)
+            except (TypeError, ValueError):
+                # an unusable token only costs the client read-your-writes, never the request
+                logger.warning("Ignoring unusable causal token.")
+        g.causal_session = session
+    return g.causal_session
+
+
+@app.after_request
+def add_causal_token(response):
+    session = g.get("causal_session")
+    if session is not None:
+        token = encode_causal_token(session)
+        if token:
+            response.headers[CAUSAL_TOKEN_HEADER] = token
+    return response
+
+
+@app.teardown_request
+def end_causal_session(exc):
+    session = g.pop("causal_session", None)
+    if session is not None:
+        session.end_session()
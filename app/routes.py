@@ -8,13 +8,17 @@ from flask_jwt_extended import JWTManager, create_access_token, jwt_required, ge
 import firebase_admin
 import os
 from firebase_admin import credentials, messaging, auth
-from datetime import datetime
+from datetime import datetime, timezone
 from bson.objectid import ObjectId
 from app.schemas.event_schema import EventFeedbackSchema
 from app.schemas.object_schema import ObjectIdSchema
 from app.schemas.user_schema import LoginSchema, UserSchema, PasswordResetSchema
 from app.schemas.role_schema import SetRoleSchema
 from app.schemas.firebase_schema import FcmTokenSchema, FcmMessageSchema
+from app.dashboard import get_teacher_dashboard
+from app.read_routing import read_db, causal_session
+from app.http_cache import events_validators, is_not_modified, not_modified_response, add_cache_headers, make_etag, to_http_date
+from app.notifications import get_messaging_backend, store_fcm_token, remove_fcm_tokens
 from marshmallow import ValidationError
 
 # Initialize CORS with default settings (allowing all origins)
@@ -38,6 +42,7 @@ jwt = JWTManager(app)
 # Initialize Firebase Admin SDK
 cred = credentials.Certificate(app.config['FIREBASE_CREDENTIALS_JSON'])  
 firebase_admin.initialize_app(cred)
+messaging_backend = get_messaging_backend(app.config['MESSAGING_BACKEND'])
 
 
 @app.route('/register', methods=['POST'])
@@ -48,7 +53,7 @@ def register():
         data = user_schema.load(request.json)
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during registration: {err.messages}")
+        logger.warning("Validation error during registration: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400
     
@@ -90,7 +95,7 @@ def password_reset():
         email = password_reset_schema.load(request.json)['email']
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during password reset: {err.messages}")
+        logger.warning("Validation error during password reset: %s", err.messages)
         # Returns error with minimal detail
         return jsonify({"message": f'Error - Invalid input.'}), 400
 
@@ -98,7 +103,7 @@ def password_reset():
         # Check if user exists in db
         user = mongo.db.users.query.filter_by(email=email).first()
         if not user:
-            logger.warning(f"Password reset requested for non-existent email.")
+            logger.warning("Password reset requested for non-existent email.")
             # Do not reveal that the email does not exist
             return jsonify({'message': 'If an account with that email exists, a password reset email will be sent.'}), 200
 
@@ -108,10 +113,10 @@ def password_reset():
 
         # Revoke all refresh tokens for the user (disables old tokens)
         auth.revoke_refresh_tokens(user.uid)
-        logger.info(f"Password reset requested for email.")
+        logger.info("Password reset requested for email.")
         return jsonify({'message': 'Password reset email sent'}), 200
     except Exception as e:
-        logger.error(f"Internal server error during password reset request: {str(e)}")
+        logger.error("Internal server error during password reset request: %s", e)
         return jsonify({'message': f'Error: Internal server error.'}), 500
 
 @app.route('/login', methods=['POST'])
@@ -122,7 +127,7 @@ def login():
         firebase_id_token = login_schema.load(request.json)['firebase_id_token']
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during login: {err.messages}")
+        logger.warning("Validation error during login: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400
 
@@ -140,7 +145,7 @@ def login():
         
         # Return the JWT token to the client along with additional information
         user = mongo.db.users.find_one({"firebase_uid": firebase_uid})
-        logger.info(f"User logged in: UID: {firebase_uid}")
+        logger.info("User logged in: UID: %s", firebase_uid)
         return jsonify({'message': 'User logged in successfully', 'token': token, 'user':
                         {'id': str(user['_id']), 'email': user['email'], 'first_name': user['first_name'], 'last_name': user['last_name'], 'role': user['role']}
                         }), 200
@@ -149,7 +154,7 @@ def login():
         return jsonify({'message': 'Error - Invalid token.'}), 401
     except Exception as e:
         # Log internal server error
-        logger.error(f"Internal server error during login: {str(e)}")
+        logger.error("Internal server error during login: %s", e)
         return jsonify({'message': 'Error - Internal server error.'}), 500
 
 @app.route('/protected', methods=['GET'])
@@ -167,7 +172,7 @@ def set_role():
         data = set_role_schema.load(request.json)
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during set_role: {err.messages}")
+        logger.warning("Validation error during set_role: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400
     
@@ -192,14 +197,14 @@ def register_fcm_token():
         data = fcm_token_schema.load(request.json)
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during registration of fcm token: {err.messages}")
+        logger.warning("Validation error during registration of fcm token: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400
     
     # update token in db
     fcm_token = data['fcm_token']
     current_user_firebase_id = get_jwt_identity()
-    mongo.db.users.update_one({"firebase_uid": current_user_firebase_id}, {"$set": {"fcm_token": fcm_token}})
+    store_fcm_token(mongo.db, current_user_firebase_id, fcm_token)
     return jsonify({"message": "Token registered successfully"}), 200
  
 
@@ -211,7 +216,7 @@ def send_notification():
         data = notification_schema.load(request.json)
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during registration: {err.messages}")
+        logger.warning("Validation error during registration: %s", err.messages)
         # Returns validation errors if the input is invalid
         return jsonify({"message": f'Error - {err.messages}'}), 400
     
@@ -220,18 +225,13 @@ def send_notification():
         title = data['title']
         body = data['body']
 
-        # Create a message to send to the device
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=title,
-                body=body,
-            ),
-            token=fcm_token,
-        )
-
-        # Send the message
-        response = messaging.send(message)
+        # Send the message to the device
+        response = messaging_backend.send(fcm_token, title, body)
         return jsonify({'success': True, 'response': response}), 200
+    except messaging.UnregisteredError as e:
+        # token is no longer valid, stop sending to it
+        remove_fcm_tokens(mongo.db, [fcm_token])
+        return jsonify({'success': False, 'error': str(e)}), 404
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
     
@@ -241,40 +241,49 @@ def get_events(user_id):
     user_id_schema = ObjectIdSchema()
     try:
         # Parses and validates JSON data
-        user_id = user_id_schema.load(user_id)
+        user_id = user_id_schema.load({"id": user_id})["id"]
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during getting events: {err.messages}")
+        logger.warning("Validation error during getting events: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": "Error - Invalid input."}), 400
 
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1, "role": 1, "firebase_uid": 1})
+    db = read_db()
+    session = causal_session()
+    user = db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1, "role": 1, "firebase_uid": 1}, session=session)
 
     # if no user with that user_id exists
     if not user:
-        logger.warning(f"Events requested for not existing user_id: {user_id}")
+        logger.warning("Events requested for not existing user_id: %s", user_id)
         jsonify({"message": "No user found."}), 400
 
     # verify if user_id matches to logged in user
     current_user_firebase_id = get_jwt_identity()
     if user["firebase_uid"] != current_user_firebase_id:
-        logger.warning(f"User_id mismatch for getting events. Given user_id does not fit to logged in user_id.")
+        logger.warning("User_id mismatch for getting events. Given user_id does not fit to logged in user_id.")
         jsonify({"message": "Unauthorized access"}), 403
 
     children_events = []
+    etag, last_modified = None, None
     if user["role"] == "parent" or user["role"] == "admin":
         # find the parent and the corresponding children
-        parent = mongo.db.parents.find_one({"user_id": ObjectId(user_id)}, {"_id": 1, "children": 1})
+        parent = db.parents.find_one({"user_id": ObjectId(user_id)}, {"_id": 1, "children": 1}, session=session)
         children_ids = parent["children"]
         # find the groups of the children
-        children_cursor = mongo.db.children.find({"_id": {"$in": children_ids}}, {"_id": 1, "first_name": 1, "classroom": 1})
+        children_cursor = db.children.find({"_id": {"$in": children_ids}}, {"_id": 1, "first_name": 1, "classroom": 1}, session=session)
         children_list = list(children_cursor)
         group_ids = list(child['classroom'].replace("Group ", "") for child in children_list)
+        # skip loading the events if the client already has the newest ones,
+        # only the etag sees removed events and roster changes so If-Modified-Since alone is not enough
+        roster = [(child["_id"], child["classroom"]) for child in children_list]
+        etag, last_modified = events_validators(db, group_ids, roster, session)
+        if is_not_modified(etag):
+            return not_modified_response(etag, last_modified)
 
         for i in range(len(group_ids)):
             # get all events for that group
-            events = list(mongo.db.events.find({"classroom": group_ids[i]},
-                                    {"_id": 1, "classroom": 1, "date": 1, "event_type": 1, "max_children_allowed": 1, "children_staying_home": 1}))
+            events = list(db.events.find({"classroom": group_ids[i]},
+                                    {"_id": 1, "classroom": 1, "date": 1, "event_type": 1, "max_children_allowed": 1, "children_staying_home": 1}, session=session))
             # string conversion
             for event in events:
                 event["_id"] = str(event["_id"])
@@ -289,14 +298,17 @@ def get_events(user_id):
                     "events": events
                 }
             )
-    # TODO: move to own endpoint for teachers
+    # teachers should use /teacher/<user_id>/dashboard, kept for older app versions
     elif user["role"] == "teacher":
-        teacher = mongo.db.teachers.find_one({"user_id": ObjectId(user_id)}, {"_id": 1, "assigned_classrooms": 1})
+        teacher = db.teachers.find_one({"user_id": ObjectId(user_id)}, {"_id": 1, "assigned_classrooms": 1}, session=session)
         group_ids = [group.replace("Group ", "") for group in teacher["assigned_classrooms"]]
+        etag, last_modified = events_validators(db, group_ids, session=session)
+        if is_not_modified(etag):
+            return not_modified_response(etag, last_modified)
         for i in range(len(group_ids)):
             # get all events for the group
-            events = list(mongo.db.events.find({"classroom": group_ids[i]},
-                                    {"_id": 1, "classroom": 1, "date": 1, "event_type": 1, "max_children_allowed": 1, "children_staying_home": 1}))
+            events = list(db.events.find({"classroom": group_ids[i]},
+                                    {"_id": 1, "classroom": 1, "date": 1, "event_type": 1, "max_children_allowed": 1, "children_staying_home": 1}, session=session))
             # string conversion
             for event in events:
                 event["_id"] = str(event["_id"])
@@ -315,8 +327,41 @@ def get_events(user_id):
         logger.warning("Role of the user requesting events is not allowed.")
         jsonify({"message": "Unauthorized access."}), 403
     
-    logger.info(f"Events retrieved for user_id.")
-    return jsonify(children_events), 200
+    logger.info("Events retrieved for user_id.")
+    response = jsonify(children_events)
+    if etag is not None:
+        add_cache_headers(response, etag, last_modified)
+    return response, 200
+
+
+@app.route('/teacher/<user_id>/dashboard', methods=['GET'])
+@jwt_required()
+def get_teacher_dashboard_route(user_id):
+    user_id_schema = ObjectIdSchema()
+    try:
+        # Parses and validates JSON data
+        user_id = user_id_schema.load({"id": user_id})["id"]
+    except ValidationError as err:
+        # Log details of validation error
+        logger.warning("Validation error during getting teacher dashboard: %s", err.messages)
+        # Returns error with minimal details
+        return jsonify({"message": "Error - Invalid input."}), 400
+
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 1, "role": 1, "firebase_uid": 1})
+    if not user:
+        logger.warning("Teacher dashboard requested for not existing user_id: %s", user_id)
+        return jsonify({"message": "No user found."}), 400
+
+    # verify if user_id matches to logged in user and is a teacher
+    current_user_firebase_id = get_jwt_identity()
+    if user["firebase_uid"] != current_user_firebase_id or user["role"] != "teacher":
+        logger.warning("Unauthorized request for teacher dashboard.")
+        return jsonify({"message": "Unauthorized access."}), 403
+
+    # roster, staying home names and capacity per classroom in a single aggregation
+    classrooms = get_teacher_dashboard(read_db(), user_id, causal_session())
+    logger.info("Teacher dashboard retrieved for user_id.")
+    return jsonify(classrooms), 200
 
 
 @app.route('/events/<event_id>/feedback', methods=['POST'])
@@ -325,39 +370,43 @@ def post_event_feedback(event_id):
     event_feedback_schema = EventFeedbackSchema()
     try:
         # Parses and validates JSON data
-        event_id = event_id_schema.load(event_id)
+        event_id = event_id_schema.load({"id": event_id})["id"]
         data = event_feedback_schema.load(request.json)
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during posting event feedback: {err.messages}")
+        logger.warning("Validation error during posting event feedback: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400    
 
     child_id = data['child_id']
+    # causally consistent session, its causal token lets the following reads on secondaries see these writes
+    session = causal_session()
     # check if child exists
-    child = mongo.db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1})
+    child = mongo.db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1}, session=session)
     if not child:
-        logger.warning(f"Event feedback posted for child_id {child_id} that does not exist.")
+        logger.warning("Event feedback posted for child_id %s that does not exist.", child_id)
         jsonify({"message": "Error - Invalid input."}), 400
-    
+
     # check if child has already submitted feedback to stay home
-    event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
+    event = mongo.db.events.find_one({"_id": ObjectId(event_id)}, session=session)
     children_staying_home = event.get('children_staying_home', [])
     if child["_id"] in children_staying_home:
-        logger.warning(f"Feedback for child_id {child_id} is already available.")
+        logger.warning("Feedback for child_id %s is already available.", child_id)
         jsonify({"message": "Error - Invalid input."}), 400
-    
+
     mongo.db.events.update_one(
         {"_id": ObjectId(event_id)},
-        {"$addToSet": {"children_staying_home": ObjectId(child_id)}}
+        {"$addToSet": {"children_staying_home": ObjectId(child_id)}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        session=session
     )
 
     # Also update the child's event_feedback field
     mongo.db.children.update_one(
         {"_id": ObjectId(child_id)},
-        {"$addToSet": {"event_feedback": ObjectId(event_id)}}
+        {"$addToSet": {"event_feedback": ObjectId(event_id)}},
+        session=session
     )
-    logger.info(f"Stored event feedback for child successfully.")
+    logger.info("Stored event feedback for child successfully.")
     return jsonify({"message": "Feedback recorded successfully"}), 200
 
 @app.route('/events/<event_id>/feedback/<child_id>', methods=['GET'])
@@ -366,32 +415,40 @@ def get_feedback(event_id, child_id):
     child_id_schema = ObjectIdSchema()
     try:
         # Parses and validates JSON data
-        event_id = event_id_schema.load(event_id)
-        child_id = child_id_schema.load(child_id)
+        event_id = event_id_schema.load({"id": event_id})["id"]
+        child_id = child_id_schema.load({"id": child_id})["id"]
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during getting feedback for event: {err.messages}")
+        logger.warning("Validation error during getting feedback for event: %s", err.messages)
         # Returns error with minimal feedback
         return jsonify({"message": f'Error - Invalid input.'}), 400
     
-    event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
+    db = read_db()
+    session = causal_session()
+    event = db.events.find_one({"_id": ObjectId(event_id)}, session=session)
     # check if event exists
     if not event:
-        logger.warning(f"Requested feedback for event_id {event_id} that does not exist.")
+        logger.warning("Requested feedback for event_id %s that does not exist.", event_id)
         jsonify({"message": "Error - Invalid input."}), 400
-    child = mongo.db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1})["_id"]
+    child = db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1}, session=session)["_id"]
     # check if child exists
     if not child:
-        logger.warning(f"Requested event feedback for child_id {child_id} that does not exist.")
+        logger.warning("Requested event feedback for child_id %s that does not exist.", child_id)
         jsonify({"message": "Error - Invalid input."}), 400
 
+    # feedback only changes together with the event, the etag covers updated_at to the microsecond
+    last_modified = to_http_date(event["updated_at"]) if "updated_at" in event else None
+    etag = make_etag(event["_id"], event.get("updated_at"), child)
+    if is_not_modified(etag):
+        return not_modified_response(etag, last_modified)
+
     logger.info("Returning feedback for child if staying home.")
     # Find out if the child is staying home
     children_staying_home = event.get('children_staying_home', [])
     if child in children_staying_home:
-        return jsonify({"staying_home": True}), 200
+        return add_cache_headers(jsonify({"staying_home": True}), etag, last_modified), 200
     else:
-        return jsonify({"staying_home": False}), 200
+        return add_cache_headers(jsonify({"staying_home": False}), etag, last_modified), 200
 
 @app.route('/events/<event_id>/feedback/<child_id>/withdraw', methods=['POST'])
 def withdraw_feedback(event_id, child_id):
@@ -399,36 +456,38 @@ def withdraw_feedback(event_id, child_id):
     child_id_schema = ObjectIdSchema()
     try:
         # Parses and validates JSON data
-        event_id = event_id_schema.load(event_id)
-        child_id = child_id_schema.load(child_id)
+        event_id = event_id_schema.load({"id": event_id})["id"]
+        child_id = child_id_schema.load({"id": child_id})["id"]
     except ValidationError as err:
         # Log details of validation error
-        logger.warning(f"Validation error during withdrawing feedback: {err.messages}")
+        logger.warning("Validation error during withdrawing feedback: %s", err.messages)
         # Returns error with minimal details
         return jsonify({"message": f'Error - Invalid input.'}), 400
     
-    event = mongo.db.events.find_one({"_id": ObjectId(event_id)})
+    # causally consistent session, its causal token lets the following reads on secondaries see these writes
+    session = causal_session()
+    event = mongo.db.events.find_one({"_id": ObjectId(event_id)}, session=session)
     # check if event exists
     if not event:
-        logger.warning(f"Requested feedback for event_id {event_id} that does not exist.")
+        logger.warning("Requested feedback for event_id %s that does not exist.", event_id)
         jsonify({"message": "Error - Invalid input."}), 400
-    child = mongo.db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1, "event_feedback": 1})
+    child = mongo.db.children.find_one({"_id": ObjectId(child_id)}, {"_id": 1, "event_feedback": 1}, session=session)
     # check if child exists
     if not child:
-        logger.warning(f"Requested event feedback for child_id {child_id} that does not exist.")
+        logger.warning("Requested event feedback for child_id %s that does not exist.", child_id)
         jsonify({"message": "Error - Invalid input."}), 400
 
     children_staying_home = event.get('children_staying_home', [])
     if child["_id"] in children_staying_home:
         # update event
         children_staying_home.remove(child["_id"])
-        mongo.db.events.update_one({"_id": ObjectId(event_id)}, {"$set": {"children_staying_home": children_staying_home}})
+        mongo.db.events.update_one({"_id": ObjectId(event_id)}, {"$set": {"children_staying_home": children_staying_home, "updated_at": datetime.now(timezone.utc)}}, session=session)
         # update child feedback
         event_feedback = child["event_feedback"]
         event_feedback.remove(event["_id"])
-        mongo.db.children.update_one({"_id": ObjectId(child_id)}, {"$set": {"event_feedback": event_feedback}})
+        mongo.db.children.update_one({"_id": ObjectId(child_id)}, {"$set": {"event_feedback": event_feedback}}, session=session)
         logger.info("Withdrawing child feedback for event.")
         return jsonify({"message": "Feedback withdrawn"}), 200
     else:
-        logger.warning(f"Attempt to withdraw child feedback that does not exist.")
+        logger.warning("Attempt to withdraw child feedback that does not exist.")
         return jsonify({"message": "Error - Invalid input."}), 400
\ No newline at end of file
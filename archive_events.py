@@ -0,0 +1,13 @@
+# Periodic job (e.g. Heroku Scheduler or cron) that archives past events, safe to rerun after a crash
+from datetime import datetime, time, timedelta
+from app import app, mongo
+from app.archive import archive_events, get_archive
+
+if __name__ == "__main__":
+    with app.app_context():
+        mongo.db.events.create_index("date")
+        archive = get_archive(mongo.db, app.config['ARCHIVE_TARGET'], app.config['ARCHIVE_DIR'])
+        # start of the day, so runs on the same day share the cutoff
+        cutoff = datetime.combine(datetime.now().date() - timedelta(days=app.config['ARCHIVE_AFTER_DAYS']), time.min)
+        archived = archive_events(mongo.db, archive, cutoff, app.config['ARCHIVE_BATCH_SIZE'])
+        print(f"Archived {archived} events dated before {cutoff.date()}.")
@@ -0,0 +1,44 @@
+# Bytes on the wire and CPU cost of compressing event feeds of different sizes.
+# Run from the repository root: python -m benchmarks.bench_compression
+import json
+import time
+from bson.objectid import ObjectId
+from app.compression import BrotliCompressor, GzipCompressor, brotli, compress
+
+REPEAT = 50
+LEVELS = [1, 6, 9]
+
+
+def event_feed(num_events, children_per_event):
+    # same shape as the get_events response
+    return json.dumps([{
+        "child_id": str(ObjectId()),
+        "child_name": "Anna",
+        "classroom": "A",
+        "events": [{
+            "_id": str(ObjectId()),
+            "classroom": "A",
+            "date": "2024-11-05T08:00:00",
+            "event_type": "Limited Attendance",
+            "max_children_allowed": 10,
+            "children_staying_home": [str(ObjectId()) for _ in range(children_per_event)],
+        } for _ in range(num_events)],
+    }]).encode()
+
+
+def measure(compressor_class, level, data):
+    start = time.process_time()
+    for _ in range(REPEAT):
+        compressed = compress(data, compressor_class(level))
+    return len(compressed), (time.process_time() - start) / REPEAT * 1e6
+
+
+if __name__ == "__main__":
+    compressors = [GzipCompressor] + ([BrotliCompressor] if brotli is not None else [])
+    for num_events, children_per_event in [(5, 2), (20, 10), (100, 25), (500, 25)]:
+        data = event_feed(num_events, children_per_event)
+        print(f"{num_events} events, {children_per_event} children staying home each: {len(data)} bytes")
+        for compressor_class in compressors:
+            for level in LEVELS:
+                size, cpu_us = measure(compressor_class, level, data)
+                print(f"  {compressor_class.encoding:<4} level {level}: {size:8d} bytes ({size / len(data):5.1%}), {cpu_us:9.1f} us cpu")
@@ -0,0 +1,56 @@
+# Measures the per request overhead of the logging pipeline at each log level.
+# Run from the repository root: python -m benchmarks.bench_logging
+import logging
+import os
+import sys
+import time
+from flask import Flask
+from app.logging_config import configure_logging
+
+NUM_REQUESTS = 2000
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+bench_app = Flask(__name__)
+bench_app.config['LOG_LEVEL'] = "ERROR"
+bench_app.config['LOG_SAMPLE_RATES'] = {"sampled_events": 0.1}
+logger = logging.getLogger("bench")
+events = [{"_id": str(i), "children_staying_home": [str(c) for c in range(20)]} for i in range(20)]
+
+
+def log_like_get_events():
+    # same shape as the events route: a few info lines with arguments and one warning
+    for event in events[:5]:
+        logger.debug("Event %s has %s children staying home", event["_id"], len(event["children_staying_home"]))
+        logger.info("Loaded event %s", event)
+    logger.warning("User_id mismatch for getting events: %s", events[0]["_id"])
+    return "ok"
+
+
+bench_app.add_url_rule('/events', 'events', log_like_get_events)
+bench_app.add_url_rule('/sampled_events', 'sampled_events', log_like_get_events)
+bench_app.add_url_rule('/no_logging', 'no_logging', lambda: "ok")
+
+
+def time_requests(client, path):
+    start = time.perf_counter()
+    for _ in range(NUM_REQUESTS):
+        client.get(path)
+    return (time.perf_counter() - start) / NUM_REQUESTS * 1e6
+
+
+if __name__ == "__main__":
+    # discard the log output so only the request thread cost is measured
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+    listener = configure_logging(bench_app)
+    sys.stderr = stderr
+
+    client = bench_app.test_client()
+    baseline = time_requests(client, '/no_logging')
+    print(f"baseline without log calls: {baseline:.1f} us/request")
+    for level in LEVELS:
+        logging.getLogger().setLevel(level)
+        full = time_requests(client, '/events')
+        sampled = time_requests(client, '/sampled_events')
+        print(f"{level:<8} overhead: {full - baseline:7.1f} us/request, with 10% sampling: {sampled - baseline:7.1f} us/request")
+    listener.stop()
@@ -0,0 +1,71 @@
+# Compares the teacher dashboard aggregation with building the roster through per child feedback calls.
+# Run from the repository root: python -m benchmarks.bench_teacher_dashboard
+import random
+import time
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from config import Config
+from app.dashboard import get_teacher_dashboard
+
+NUM_CHILDREN = 25
+NUM_EVENTS = 200
+REPEAT = 5
+
+client = MongoClient(Config.MONGO_URI)
+db = client.kita_bench
+
+
+def seed():
+    for collection in ["teachers", "children", "events"]:
+        db[collection].drop()
+    teacher_user_id = db.users.insert_one({"role": "teacher"}).inserted_id
+    db.teachers.insert_one({"user_id": teacher_user_id, "assigned_classrooms": ["Group A"]})
+    child_ids = db.children.insert_many([
+        {"first_name": f"Child {i}", "classroom": "Group A", "event_feedback": []} for i in range(NUM_CHILDREN)
+    ]).inserted_ids
+    db.events.insert_many([
+        {
+            "classroom": "A",
+            "date": (datetime.now() + timedelta(days=i)).isoformat(),
+            "event_type": "Limited Attendance",
+            "max_children_allowed": random.randint(5, 20),
+            "children_staying_home": random.sample(child_ids, random.randint(0, 10)),
+        }
+        for i in range(NUM_EVENTS)
+    ])
+    db.children.create_index("classroom")
+    db.events.create_index("classroom")
+    return teacher_user_id
+
+
+def roster_with_feedback_calls(user_id):
+    # what the teacher app did before: events per classroom, then the feedback endpoint per child and event
+    teacher = db.teachers.find_one({"user_id": user_id}, {"assigned_classrooms": 1})
+    calls = 1
+    for group in teacher["assigned_classrooms"]:
+        children = list(db.children.find({"classroom": group}, {"_id": 1, "first_name": 1}))
+        events = list(db.events.find({"classroom": group.replace("Group ", "")}))
+        calls += 2
+        for event in events:
+            for child in children:
+                db.events.find_one({"_id": event["_id"]})
+                db.children.find_one({"_id": child["_id"]}, {"_id": 1})
+                calls += 2
+    return calls
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = function(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000, result
+
+
+if __name__ == "__main__":
+    user_id = seed()
+    aggregation_ms, dashboard = timed(get_teacher_dashboard, db, user_id)
+    calls_ms, calls = timed(roster_with_feedback_calls, user_id)
+    print(f"{NUM_CHILDREN} children, {NUM_EVENTS} events")
+    print(f"aggregation:    {aggregation_ms:9.1f} ms, 1 query, {len(dashboard[0]['events'])} events returned")
+    print(f"feedback calls: {calls_ms:9.1f} ms, {calls} queries")
+    client.drop_database("kita_bench")
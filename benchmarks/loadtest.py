@@ -0,0 +1,134 @@
+# Replays the morning drop-off spike against benchmarks/loadtest_server.py (needs httpx: pip install httpx).
+# Run from the repository root: python -m benchmarks.loadtest --sessions 500 --duration 60
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+import httpx
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.finished_at = []
+
+    async def request(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, "connection error"
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][status] += 1
+        self.finished_at.append(time.perf_counter())
+        return response
+
+
+def client_address(session_number):
+    # one address per session, like parents on their own phones, so the rate limiter sees separate clients
+    return f"10.{session_number >> 16 & 255}.{session_number >> 8 & 255}.{session_number & 255}"
+
+
+async def login(recorder, client, id_token, address):
+    forwarded = {"X-Forwarded-For": address}
+    response = await recorder.request(client, "login", "POST", "/login", headers=forwarded,
+                                      json={"firebase_id_token": id_token})
+    if response is None or response.status_code != 200:
+        return None, None
+    body = response.json()
+    return body["user"]["id"], {**forwarded, "Authorization": f"Bearer {body['token']}"}
+
+
+async def parent_session(recorder, client, parent, event_ids, think_time, address):
+    user_id, headers = await login(recorder, client, parent["id_token"], address)
+    if user_id is None or not event_ids:
+        return
+    await recorder.request(client, "events feed", "GET", f"/user/{user_id}/events", headers=headers)
+    # a parent volunteers for a few events, checks one and withdraws some again
+    chosen = random.sample(event_ids, min(len(event_ids), random.randint(1, 4)))
+    for event_id in chosen:
+        await asyncio.sleep(random.uniform(0, think_time))
+        await recorder.request(client, "post feedback", "POST", f"/events/{event_id}/feedback",
+                               headers=headers, json={"child_id": parent["child_id"]})
+    await recorder.request(client, "get feedback", "GET", f"/events/{chosen[0]}/feedback/{parent['child_id']}",
+                           headers=headers)
+    for event_id in chosen[:random.randint(0, len(chosen))]:
+        await asyncio.sleep(random.uniform(0, think_time))
+        await recorder.request(client, "withdraw feedback", "POST",
+                               f"/events/{event_id}/feedback/{parent['child_id']}/withdraw", headers=headers)
+
+
+async def teacher_session(recorder, client, teacher, think_time, address):
+    user_id, headers = await login(recorder, client, teacher["id_token"], address)
+    if user_id is None:
+        return
+    for _ in range(3):
+        await recorder.request(client, "teacher dashboard", "GET", f"/teacher/{user_id}/dashboard", headers=headers)
+        await asyncio.sleep(random.uniform(0, think_time))
+
+
+async def start_at(delay, session):
+    await asyncio.sleep(delay)
+    await session
+
+
+async def run(args, manifest):
+    recorder = Recorder()
+    # most parents arrive early in the window, like the drop-off rush
+    peak = args.duration * args.peak
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30, verify=False) as client:
+        sessions = []
+        for number in range(args.sessions):
+            parent = random.choice(manifest["parents"])
+            address = client_address(0 if args.shared_address else number)
+            session = parent_session(recorder, client, parent, manifest["events"][parent["classroom"]], args.think_time, address)
+            sessions.append(start_at(random.triangular(0, args.duration, peak), session))
+        for number, teacher in enumerate(manifest["teachers"], start=args.sessions):
+            address = client_address(0 if args.shared_address else number)
+            session = teacher_session(recorder, client, teacher, args.think_time, address)
+            sessions.append(start_at(random.uniform(0, args.duration), session))
+
+        start = time.perf_counter()
+        await asyncio.gather(*sessions)
+        elapsed = time.perf_counter() - start
+    return recorder, start, elapsed
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(recorder, start, elapsed):
+    total = sum(len(latencies) for latencies in recorder.latencies.values())
+    per_second = Counter(int(finished - start) for finished in recorder.finished_at)
+    print(f"{total} requests in {elapsed:.1f} s, {total / elapsed:.1f} req/s on average, {max(per_second.values(), default=0)} req/s at peak")
+    print(f"{'request':<20}{'count':>7}{'errors':>8}{'429s':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for name, latencies in recorder.latencies.items():
+        statuses = recorder.statuses[name]
+        errors = sum(count for status, count in statuses.items() if status == "connection error" or status >= 400)
+        print(f"{name:<20}{len(latencies):>7}{errors / len(latencies):>8.1%}{statuses[429]:>7}"
+              f"{percentile(latencies, 0.5) * 1000:>9.1f}{percentile(latencies, 0.95) * 1000:>9.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>9.1f}  {dict(statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the morning drop-off traffic spike.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--sessions", type=int, default=500, help="parent sessions in the spike")
+    parser.add_argument("--duration", type=float, default=60, help="length of the spike in seconds (1800 for the real 30 minutes)")
+    parser.add_argument("--peak", type=float, default=0.3, help="position of the peak within the spike, 0 to 1")
+    parser.add_argument("--think-time", type=float, default=2, help="max pause between actions of a session in seconds")
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--shared-address", action="store_true", help="send every session from one client address")
+    args = parser.parse_args()
+
+    with open(args.manifest) as manifest_file:
+        manifest = json.load(manifest_file)
+    report(*asyncio.run(run(args, manifest)))
@@ -0,0 +1,101 @@
+# Runs the app against a seeded database with Firebase stubbed out, as target for benchmarks/loadtest.py.
+# Run from the repository root: python -m benchmarks.loadtest_server
+# Seeds its own database, kita_loadtest on localhost unless LOADTEST_MONGO_URI is set, never the MONGO_URI of the app.
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+import firebase_admin
+from firebase_admin import auth, credentials
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+TOKEN_PREFIX = "loadtest:"
+
+# PyMongo binds mongo.db when the app is imported, so the load test database has to be chosen before that
+os.environ['MONGO_URI'] = os.getenv('LOADTEST_MONGO_URI', 'mongodb://localhost:27017/kita_loadtest')
+
+# stub Firebase before the app initializes it: no credentials needed, id tokens are "loadtest:<uid>"
+os.environ.setdefault('FIREBASE_CREDENTIALS_JSON', 'stub')
+os.environ.setdefault('MESSAGING_BACKEND', 'fake')
+credentials.Certificate = lambda path: None
+firebase_admin.initialize_app = lambda cred: None
+
+
+def verify_id_token(id_token):
+    if not id_token.startswith(TOKEN_PREFIX):
+        raise auth.InvalidIdTokenError("Not a load test token.", None)
+    uid = id_token[len(TOKEN_PREFIX):]
+    return {"uid": uid, "email": f"{uid}@loadtest.local", "email_verified": True}
+
+
+auth.verify_id_token = verify_id_token
+
+from app import app, mongo  # noqa: E402 (needs the stubs above)
+
+# the load test client sends one X-Forwarded-For address per session, the rate limiter keys on it
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+GROUPS = ["A", "B", "C"]
+
+
+def seed(db, num_parents, num_teachers, events_per_group):
+    """Creates parents with one child each, teachers and upcoming events, returns the manifest for the client."""
+    # seeding drops collections, so never touch a database that is not meant for load tests
+    if "loadtest" not in db.name:
+        raise Exception(f"Refusing to seed database {db.name}, its name has to contain 'loadtest'")
+    for collection in ["users", "parents", "children", "teachers", "events"]:
+        db[collection].drop()
+
+    parents = []
+    for i in range(num_parents):
+        uid = f"parent-{i}"
+        user_id = db.users.insert_one({"firebase_uid": uid, "email": f"{uid}@loadtest.local", "first_name": "Parent",
+                                       "last_name": str(i), "role": "parent"}).inserted_id
+        group = random.choice(GROUPS)
+        child_id = db.children.insert_one({"first_name": f"Child {i}", "classroom": f"Group {group}",
+                                           "event_feedback": []}).inserted_id
+        db.parents.insert_one({"user_id": user_id, "children": [child_id]})
+        parents.append({"id_token": TOKEN_PREFIX + uid, "child_id": str(child_id), "classroom": group})
+
+    teachers = []
+    for i in range(num_teachers):
+        uid = f"teacher-{i}"
+        user_id = db.users.insert_one({"firebase_uid": uid, "email": f"{uid}@loadtest.local", "first_name": "Teacher",
+                                       "last_name": str(i), "role": "teacher"}).inserted_id
+        db.teachers.insert_one({"user_id": user_id, "assigned_classrooms": [f"Group {GROUPS[i % len(GROUPS)]}"]})
+        teachers.append({"id_token": TOKEN_PREFIX + uid})
+
+    events = {}
+    for group in GROUPS:
+        events[group] = [str(event_id) for event_id in db.events.insert_many([{
+            "classroom": group,
+            "date": (datetime.now() + timedelta(days=day + 1)).isoformat(),
+            "event_type": "Limited Attendance",
+            "max_children_allowed": random.randint(5, 20),
+            "children_staying_home": [],
+            "updated_at": datetime.utcnow(),
+        } for day in range(events_per_group)]).inserted_ids]
+
+    db.users.create_index("firebase_uid")
+    db.children.create_index("classroom")
+    db.events.create_index([("classroom", 1), ("_id", 1), ("updated_at", 1)])
+    return {"parents": parents, "teachers": teachers, "events": events}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a load test database and serve the app with Firebase stubbed.")
+    parser.add_argument("--parents", type=int, default=500)
+    parser.add_argument("--teachers", type=int, default=10)
+    parser.add_argument("--events-per-group", type=int, default=10)
+    parser.add_argument("--manifest", default="loadtest_manifest.json")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        manifest = seed(mongo.db, args.parents, args.teachers, args.events_per_group)
+    with open(args.manifest, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+    print(f"Seeded {args.parents} parents and {args.teachers} teachers, manifest written to {args.manifest}.")
+
+    app.run(host='127.0.0.1', port=args.port, threaded=True)
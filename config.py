@@ -14,7 +14,38 @@ class Config:
     FIREBASE_CREDENTIALS_JSON = os.getenv('FIREBASE_CREDENTIALS_JSON')
     if not FIREBASE_CREDENTIALS_JSON:
         raise Exception("FIREBASE_CREDENTIALS_JSON not set in environment variables")
+    # Messaging backend for FCM ('firebase' or 'fake' for tests)
+    MESSAGING_BACKEND = os.getenv('MESSAGING_BACKEND', 'firebase')
+    # FCM tokens not seen for this many days are dropped by sweep_fcm_tokens.py
+    FCM_TOKEN_MAX_AGE_DAYS = int(os.getenv('FCM_TOKEN_MAX_AGE_DAYS', 60))
     
+    # Read only routes (endpoint names) that read from secondaries with readPreference secondaryPreferred
+    # Clients echo the X-Causal-Token response header so these reads see their own earlier writes,
+    # requests without a valid token read from the primary
+    SECONDARY_READ_ROUTES = os.getenv('SECONDARY_READ_ROUTES', 'get_events,get_feedback,get_teacher_dashboard_route').split(',')
+    # Max replication lag of a secondary used for these reads, MongoDB requires at least 90 seconds
+    READ_MAX_STALENESS_SECONDS = int(os.getenv('READ_MAX_STALENESS_SECONDS', 90))
+    if READ_MAX_STALENESS_SECONDS < 90:
+        raise Exception("READ_MAX_STALENESS_SECONDS must be at least 90")
+
+    # Responses smaller than COMPRESS_MIN_SIZE bytes are sent uncompressed
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    # Seconds clients may reuse event and feedback responses before revalidating
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+
+    # Events dated more than ARCHIVE_AFTER_DAYS ago are moved by archive_events.py
+    # into the events_archive collection ('collection') or gzip NDJSON files in ARCHIVE_DIR ('ndjson')
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_TARGET = os.getenv('ARCHIVE_TARGET', 'collection')
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')
+
+    # Logging level and per route sampling of info/debug logs, e.g. LOG_SAMPLE_RATES=get_events=0.1,get_feedback=0.5
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'ERROR')
+    LOG_SAMPLE_RATES = {route.strip(): float(rate) for route, rate in
+                        (item.split('=') for item in os.getenv('LOG_SAMPLE_RATES', '').split(',') if item)}
+
     # Retrieve admin credentials
     admin_username = os.getenv('ADMIN_USERNAME')
     admin_password = os.getenv('ADMIN_PASSWORD')
@@ -0,0 +1,24 @@
+import os
+import pytest
+
+# PyMongo binds mongo.db when the app is imported, so the test database has to be chosen before that
+os.environ['MONGO_URI'] = os.getenv('TEST_MONGO_URI', 'mongodb://localhost:27017/test_db')
+
+from app import app, mongo  # noqa: E402
+
+COLLECTIONS = ["users", "parents", "children", "teachers", "classrooms", "events", "events_archive", "archive_checkpoints"]
+
+@pytest.fixture
+def db():
+    app.config['TESTING'] = True
+    # never clear a database that is not meant for tests
+    assert mongo.db.name.startswith("test"), f"Refusing to clear database {mongo.db.name}"
+
+    with app.app_context():
+        for collection in COLLECTIONS:
+            mongo.db[collection].delete_many({})  # Clear the test database before each test
+        yield mongo.db
+
+@pytest.fixture
+def client(db):
+    yield app.test_client()
@@ -4,6 +4,7 @@ from pymongo import MongoClient
 from datetime import datetime, timedelta
 from faker import Faker
 from werkzeug.security import generate_password_hash
+from app.notifications import ensure_fcm_indexes
 
 
 # Initialize Faker for generating random data
@@ -164,7 +165,8 @@ def create_events(classroom_names, num_events=5):
             "date": (datetime.now() + timedelta(days=random.randint(1, 30))).isoformat(),
             "event_type": event_type,
             "max_children_allowed": max_children,
-            "children_staying_home": []  # List of child IDs who volunteered to stay home
+            "children_staying_home": [],  # List of child IDs who volunteered to stay home
+            "updated_at": datetime.utcnow()  # Last-Modified of the event feed
         }
         events_collection.insert_one(event)
 
@@ -174,5 +176,11 @@ child_ids = create_children(num_children=40, parent_ids=parent_ids)
 teacher_ids = create_teachers(num_teachers=10)
 create_classrooms(groups=['A', 'B', 'C'], teacher_ids=teacher_ids)
 create_events(classroom_names=['A', 'B', 'C'], num_events=10)
+# classroom indexes for the teacher dashboard lookups, the second one covers the ETag and Last-Modified of event feeds
+children_collection.create_index("classroom")
+events_collection.create_index([("classroom", 1), ("_id", 1), ("updated_at", 1)])
+# date index for the archival of past events
+events_collection.create_index("date")
+ensure_fcm_indexes(db)
 
 print("Database initialization completed successfully.")
@@ -0,0 +1,10 @@
+# Periodic job (e.g. Heroku Scheduler or cron) that removes stale and unregistered FCM tokens
+from app import app, mongo
+from app.notifications import ensure_fcm_indexes, get_messaging_backend, sweep_fcm_tokens
+
+if __name__ == "__main__":
+    with app.app_context():
+        ensure_fcm_indexes(mongo.db)
+        backend = get_messaging_backend(app.config['MESSAGING_BACKEND'])
+        result = sweep_fcm_tokens(mongo.db, backend, app.config['FCM_TOKEN_MAX_AGE_DAYS'])
+        print(f"Removed stale tokens from {result['stale_users']} users and {result['unregistered_tokens']} unregistered tokens.")
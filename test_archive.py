@@ -0,0 +1,62 @@
+import gzip
+import pytest
+from datetime import datetime, timedelta
+from bson import json_util
+from app.archive import CHECKPOINT_ID, CollectionArchive, NdjsonArchive, archive_events
+
+def seed_events(db, now):
+    old_ids = db.events.insert_many([
+        {"classroom": "A", "date": (now - timedelta(days=100 + i)).isoformat(), "children_staying_home": []} for i in range(5)
+    ]).inserted_ids
+    new_id = db.events.insert_one({"classroom": "A", "date": (now + timedelta(days=1)).isoformat(), "children_staying_home": []}).inserted_id
+    child_id = db.children.insert_one({"first_name": "Anna", "event_feedback": [old_ids[0], new_id]}).inserted_id
+    return old_ids, new_id, child_id
+
+def test_archive_moves_old_events_to_collection(db):
+    now = datetime.now()
+    old_ids, new_id, child_id = seed_events(db, now)
+
+    archived = archive_events(db, CollectionArchive(db), now - timedelta(days=90), batch_size=2)
+
+    assert archived == 5
+    assert [event["_id"] for event in db.events.find()] == [new_id]
+    assert db.events_archive.count_documents({}) == 5
+    assert db.children.find_one({"_id": child_id})["event_feedback"] == [new_id]
+    assert db.archive_checkpoints.find_one({"_id": CHECKPOINT_ID}) is None
+
+def test_archive_resumes_from_checkpoint(db):
+    now = datetime.now()
+    cutoff = now - timedelta(days=90)
+    old_ids, _, _ = seed_events(db, now)
+    # the crashed run already moved the first three events
+    db.events.delete_many({"_id": {"$in": old_ids[:3]}})
+    db.archive_checkpoints.insert_one({"_id": CHECKPOINT_ID, "cutoff": cutoff.isoformat(), "last_id": old_ids[2]})
+
+    archived = archive_events(db, CollectionArchive(db), cutoff, batch_size=2)
+
+    assert archived == 2
+    assert sorted(event["_id"] for event in db.events_archive.find()) == old_ids[3:]
+
+def test_archive_resumes_checkpoint_with_new_cutoff(db):
+    now = datetime.now()
+    old_ids, new_id, _ = seed_events(db, now)
+    # the crashed run only covered the two oldest events, which it had not reached yet
+    first_cutoff = now - timedelta(days=102)
+    db.archive_checkpoints.insert_one({"_id": CHECKPOINT_ID, "cutoff": first_cutoff.isoformat(), "last_id": old_ids[2]})
+
+    archived = archive_events(db, CollectionArchive(db), now - timedelta(days=90), batch_size=2)
+
+    assert archived == 5
+    assert sorted(event["_id"] for event in db.events_archive.find()) == old_ids
+    assert [event["_id"] for event in db.events.find()] == [new_id]
+    assert db.archive_checkpoints.find_one({"_id": CHECKPOINT_ID}) is None
+
+def test_archive_writes_ndjson(db, tmp_path):
+    now = datetime.now()
+    old_ids, _, _ = seed_events(db, now)
+
+    archive_events(db, NdjsonArchive(str(tmp_path)), now - timedelta(days=90), batch_size=10)
+
+    with gzip.open(tmp_path / f"events-{old_ids[0]}.ndjson.gz", "rt", encoding="utf-8") as archive_file:
+        events = [json_util.loads(line) for line in archive_file]
+    assert [event["_id"] for event in events] == old_ids
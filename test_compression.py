@@ -0,0 +1,51 @@
+import gzip
+import zlib
+import pytest
+from flask import Flask, Response, jsonify
+from app.compression import GzipCompressor, compress_stream, configure_compression
+
+@pytest.fixture
+def client():
+    test_app = Flask(__name__)
+    test_app.config['COMPRESS_MIN_SIZE'] = 500
+    test_app.config['COMPRESS_LEVEL'] = 6
+    configure_compression(test_app)
+
+    @test_app.route('/large')
+    def large():
+        return jsonify([{"children_staying_home": ["0" * 24] * 20}] * 10)
+
+    @test_app.route('/small')
+    def small():
+        return jsonify({"staying_home": True})
+
+    @test_app.route('/stream')
+    def stream():
+        return Response((f'{{"event": {i}}}\n' for i in range(100)), mimetype="application/json")
+
+    yield test_app.test_client()
+
+def test_large_response_is_gzipped(client):
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).startswith(b'[{"children_staying_home"')
+
+def test_small_response_is_not_compressed(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_response_is_not_compressed_without_accept_encoding(client):
+    response = client.get('/large')
+    assert 'Content-Encoding' not in response.headers
+
+def test_streamed_response_is_gzipped(client):
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).count(b'"event"') == 100
+
+def test_stream_chunks_are_flushed_one_by_one():
+    stream = compress_stream(iter([b'{"event": 1}\n', b'{"event": 2}\n']), GzipCompressor(6))
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(next(stream)) == b'{"event": 1}\n'
+    assert decompressor.decompress(next(stream)) == b'{"event": 2}\n'
@@ -0,0 +1,82 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app.dashboard import get_teacher_dashboard
+
+def test_teacher_dashboard_aggregates_per_classroom(db):
+    teacher_user_id = db.users.insert_one({"role": "teacher"}).inserted_id
+    db.teachers.insert_one({"user_id": teacher_user_id, "assigned_classrooms": ["Group A"]})
+    anna, ben, _ = db.children.insert_many([
+        {"first_name": "Anna", "classroom": "Group A"},
+        {"first_name": "Ben", "classroom": "Group A"},
+        {"first_name": "Cleo", "classroom": "Group A"},
+    ]).inserted_ids
+    db.children.insert_one({"first_name": "Dana", "classroom": "Group B"})
+    event_id = db.events.insert_one({
+        "classroom": "A",
+        "date": "2024-11-05T08:00:00",
+        "event_type": "Limited Attendance",
+        "max_children_allowed": 2,
+        "children_staying_home": [anna],
+    }).inserted_id
+
+    dashboard = get_teacher_dashboard(db, teacher_user_id)
+
+    assert len(dashboard) == 1
+    classroom = dashboard[0]
+    assert classroom["classroom"] == "A"
+    assert classroom["roster_size"] == 3
+    event = classroom["events"][0]
+    assert event["_id"] == str(event_id)
+    assert event["staying_home_count"] == 1
+    assert event["children_staying_home"] == [{"child_id": str(anna), "child_name": "Anna"}]
+    assert event["remaining_capacity"] == 0
+
+def test_teacher_dashboard_closed_event_and_unknown_children(db):
+    teacher_user_id = db.users.insert_one({"role": "teacher"}).inserted_id
+    db.teachers.insert_one({"user_id": teacher_user_id, "assigned_classrooms": ["Group A"]})
+    anna = db.children.insert_one({"first_name": "Anna", "classroom": "Group A"}).inserted_id
+    dana = db.children.insert_one({"first_name": "Dana", "classroom": "Group B"}).inserted_id
+    db.events.insert_one({
+        "classroom": "A",
+        "date": "2024-11-06T08:00:00",
+        "event_type": "Classroom Closed",
+        "max_children_allowed": 0,
+        "children_staying_home": [anna, dana],
+    })
+
+    event = get_teacher_dashboard(db, teacher_user_id)[0]["events"][0]
+
+    # Dana is not in the roster and counts neither in the names nor in the count
+    assert event["staying_home_count"] == 1
+    assert event["children_staying_home"] == [{"child_id": str(anna), "child_name": "Anna"}]
+    assert event["remaining_capacity"] is None
+
+@pytest.fixture
+def teacher(db):
+    user_id = db.users.insert_one({"firebase_uid": "uid-teacher", "role": "teacher"}).inserted_id
+    db.teachers.insert_one({"user_id": user_id, "assigned_classrooms": ["Group A"]})
+    db.children.insert_one({"first_name": "Anna", "classroom": "Group A"})
+    return user_id
+
+def auth_headers(identity):
+    return {"Authorization": f"Bearer {create_access_token(identity=identity)}"}
+
+def test_dashboard_route_rejects_invalid_id(client, teacher):
+    response = client.get('/teacher/not-an-id/dashboard', headers=auth_headers('uid-teacher'))
+    assert response.status_code == 400
+
+def test_dashboard_route_rejects_non_teacher(client, teacher, db):
+    parent_id = db.users.insert_one({"firebase_uid": "uid-parent", "role": "parent"}).inserted_id
+    response = client.get(f'/teacher/{parent_id}/dashboard', headers=auth_headers('uid-parent'))
+    assert response.status_code == 403
+
+def test_dashboard_route_rejects_other_user(client, teacher):
+    response = client.get(f'/teacher/{teacher}/dashboard', headers=auth_headers('uid-someone-else'))
+    assert response.status_code == 403
+
+def test_dashboard_route_returns_classrooms(client, teacher):
+    response = client.get(f'/teacher/{teacher}/dashboard', headers=auth_headers('uid-teacher'))
+    assert response.status_code == 200
+    dashboard = response.get_json()
+    assert [classroom["classroom"] for classroom in dashboard] == ["A"]
+    assert dashboard[0]["roster_size"] == 1
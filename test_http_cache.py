@@ -0,0 +1,81 @@
+import pytest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from app import mongo
+
+@pytest.fixture
+def feed(client):
+    user_id = mongo.db.users.insert_one({"firebase_uid": "uid-parent", "role": "parent"}).inserted_id
+    child_id = mongo.db.children.insert_one({"first_name": "Anna", "classroom": "Group A", "event_feedback": []}).inserted_id
+    mongo.db.parents.insert_one({"user_id": user_id, "children": [child_id]})
+    updated_at = datetime.utcnow() - timedelta(hours=1)
+    event_ids = mongo.db.events.insert_many([
+        {"classroom": "A", "date": "2024-11-05T08:00:00", "event_type": "Limited Attendance",
+         "max_children_allowed": 10, "children_staying_home": [], "updated_at": updated_at}
+        for _ in range(2)
+    ]).inserted_ids
+    headers = {"Authorization": f"Bearer {create_access_token(identity='uid-parent')}"}
+    return {"user_id": user_id, "child_id": child_id, "event_ids": event_ids, "headers": headers}
+
+def get_events(client, feed, **headers):
+    return client.get(f'/user/{feed["user_id"]}/events', headers={**feed["headers"], **headers})
+
+def test_events_have_validators(client, feed):
+    response = get_events(client, feed)
+    assert response.status_code == 200
+    # weak since gzip, br and identity responses share the etag
+    assert response.headers['ETag'].startswith('W/')
+    assert response.last_modified is not None
+    assert 'private' in response.headers['Cache-Control']
+
+def test_events_not_modified_for_matching_etag(client, feed):
+    etag = get_events(client, feed).headers['ETag']
+    response = get_events(client, feed, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+def test_events_not_modified_for_compressed_response(client, feed):
+    response = get_events(client, feed, **{'Accept-Encoding': 'gzip'})
+    response = get_events(client, feed, **{'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+def test_events_modified_after_feedback(client, feed):
+    etag = get_events(client, feed).headers['ETag']
+    client.post(f'/events/{feed["event_ids"][0]}/feedback', json={'child_id': str(feed["child_id"])})
+    assert get_events(client, feed, **{'If-None-Match': etag}).status_code == 200
+
+def test_events_modified_after_event_removed(client, feed):
+    etag = get_events(client, feed).headers['ETag']
+    mongo.db.events.delete_one({"_id": feed["event_ids"][1]})
+    assert get_events(client, feed, **{'If-None-Match': etag}).status_code == 200
+
+def test_events_modified_after_child_moved(client, feed):
+    etag = get_events(client, feed).headers['ETag']
+    mongo.db.children.update_one({"_id": feed["child_id"]}, {"$set": {"classroom": "Group B"}})
+    assert get_events(client, feed, **{'If-None-Match': etag}).status_code == 200
+
+def test_feedback_not_modified_for_matching_etag(client, feed):
+    url = f'/events/{feed["event_ids"][0]}/feedback/{feed["child_id"]}'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_json() == {"staying_home": False}
+
+    response = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+def test_feedback_ignores_if_modified_since(client, feed):
+    # a post and a withdraw within the same second would leave Last-Modified unchanged
+    url = f'/events/{feed["event_ids"][0]}/feedback/{feed["child_id"]}'
+    response = client.get(url)
+    response = client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert response.status_code == 200
+
+def test_feedback_modified_after_posting(client, feed):
+    url = f'/events/{feed["event_ids"][0]}/feedback/{feed["child_id"]}'
+    response = client.get(url)
+    client.post(f'/events/{feed["event_ids"][0]}/feedback', json={'child_id': str(feed["child_id"])})
+
+    response = client.get(url, headers={'If-Modified-Since': response.headers['Last-Modified'],
+                                        'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json() == {"staying_home": True}
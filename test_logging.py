@@ -0,0 +1,38 @@
+import json
+import logging
+import pytest
+from app import app
+from app.logging_config import REQUEST_ID_PATTERN, JsonFormatter
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    client = app.test_client()
+
+    yield client
+
+def test_response_has_generated_request_id(client):
+    response = client.get('/protected')
+    assert len(response.headers['X-Request-ID']) == 32
+
+def test_response_keeps_client_request_id(client):
+    response = client.get('/protected', headers={'X-Request-ID': 'abc-123'})
+    assert response.headers['X-Request-ID'] == 'abc-123'
+
+@pytest.mark.parametrize('request_id', ['abc"}{', 'a' * 200])
+def test_response_replaces_unsafe_request_id(client, request_id):
+    response = client.get('/protected', headers={'X-Request-ID': request_id})
+    assert response.headers['X-Request-ID'] != request_id
+    assert len(response.headers['X-Request-ID']) == 32
+
+def test_json_formatter_merges_arguments():
+    record = logging.LogRecord("app", logging.WARNING, __file__, 1, "Feedback for child_id %s", ("42",), None)
+    record.correlation_id = "abc-123"
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Feedback for child_id 42"
+    assert entry["correlation_id"] == "abc-123"
+    assert entry["level"] == "WARNING"
+
+def test_request_id_pattern_rejects_trailing_newline():
+    assert REQUEST_ID_PATTERN.fullmatch('abc-123')
+    assert not REQUEST_ID_PATTERN.fullmatch('abc\n')
@@ -0,0 +1,56 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.notifications import FakeMessagingBackend, store_fcm_token, sweep_fcm_tokens
+
+TOKEN_A = "a" * 150
+TOKEN_B = "b" * 150
+
+@pytest.fixture(autouse=True)
+def user(db):
+    db.users.insert_one({"firebase_uid": "uid-1", "role": "parent"})
+
+def test_store_fcm_token_keeps_multiple_devices(db):
+    store_fcm_token(db, "uid-1", TOKEN_A)
+    store_fcm_token(db, "uid-1", TOKEN_B)
+    store_fcm_token(db, "uid-1", TOKEN_A)
+    user = db.users.find_one({"firebase_uid": "uid-1"})
+    assert [entry["token"] for entry in user["fcm_tokens"]] == [TOKEN_A, TOKEN_B]
+
+def test_sweep_drops_stale_tokens(db):
+    store_fcm_token(db, "uid-1", TOKEN_A)
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+    db.users.update_one({"firebase_uid": "uid-1"}, {"$push": {"fcm_tokens": {"token": TOKEN_B, "last_seen": old}}})
+
+    result = sweep_fcm_tokens(db, FakeMessagingBackend(), max_age_days=60)
+    user = db.users.find_one({"firebase_uid": "uid-1"})
+    assert result["stale_users"] == 1
+    assert [entry["token"] for entry in user["fcm_tokens"]] == [TOKEN_A]
+
+def test_sweep_drops_unregistered_tokens(db):
+    store_fcm_token(db, "uid-1", TOKEN_A)
+
+    result = sweep_fcm_tokens(db, FakeMessagingBackend(unregistered_tokens=[TOKEN_A]), max_age_days=60)
+    user = db.users.find_one({"firebase_uid": "uid-1"})
+    assert result["unregistered_tokens"] == 1
+    assert "fcm_tokens" not in user
+
+def test_store_fcm_token_keeps_legacy_token(db):
+    db.users.update_one({"firebase_uid": "uid-1"}, {"$set": {"fcm_token": TOKEN_A}})
+    store_fcm_token(db, "uid-1", TOKEN_B)
+    user = db.users.find_one({"firebase_uid": "uid-1"})
+    assert "fcm_token" not in user
+    assert [entry["token"] for entry in user["fcm_tokens"]] == [TOKEN_A, TOKEN_B]
+
+def test_sweep_migrates_legacy_token(db):
+    db.users.update_one({"firebase_uid": "uid-1"}, {"$set": {"fcm_token": TOKEN_A}})
+    sweep_fcm_tokens(db, FakeMessagingBackend(), max_age_days=60)
+    user = db.users.find_one({"firebase_uid": "uid-1"})
+    assert "fcm_token" not in user
+    assert [entry["token"] for entry in user["fcm_tokens"]] == [TOKEN_A]
+
+def test_store_fcm_token_moves_device_to_new_account(db):
+    db.users.insert_one({"firebase_uid": "uid-2", "role": "parent"})
+    store_fcm_token(db, "uid-1", TOKEN_A)
+    store_fcm_token(db, "uid-2", TOKEN_A)
+    assert db.users.find_one({"firebase_uid": "uid-1"})["fcm_tokens"] == []
+    assert [entry["token"] for entry in db.users.find_one({"firebase_uid": "uid-2"})["fcm_tokens"]] == [TOKEN_A]
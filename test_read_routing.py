@@ -0,0 +1,146 @@
+# Needs a local three-member replica set, e.g.
+#   mongod --replSet rs0 --port 27018 --dbpath /tmp/rs0-0 (and ports 27019, 27020)
+#   mongosh --port 27018 --eval 'rs.initiate({_id: "rs0", members: [{_id: 0, host: "localhost:27018"}, {_id: 1, host: "localhost:27019"}, {_id: 2, host: "localhost:27020"}]})'
+#   MONGO_REPLICA_SET_URI=mongodb://localhost:27018,localhost:27019,localhost:27020/?replicaSet=rs0 pytest test_read_routing.py
+# The route tests also need the app on the replica set:
+#   TEST_MONGO_URI=mongodb://localhost:27018,localhost:27019,localhost:27020/test_db?replicaSet=rs0
+import base64
+import os
+import time
+from types import SimpleNamespace
+import bson
+import pytest
+from bson.timestamp import Timestamp
+from pymongo import MongoClient, monitoring
+from app import app, mongo
+from app.read_routing import (CAUSAL_TOKEN_HEADER, advance_session, decode_causal_token, encode_causal_token,
+                              read_db, secondary_db, secondary_preferred)
+
+REPLICA_SET_URI = os.getenv('MONGO_REPLICA_SET_URI')
+
+
+class CommandAddresses(monitoring.CommandListener):
+    def __init__(self):
+        self.addresses = []
+
+    def started(self, event):
+        if event.command_name == "find":
+            self.addresses.append(event.connection_id)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+@pytest.fixture
+def replica_set():
+    if not REPLICA_SET_URI:
+        pytest.skip("MONGO_REPLICA_SET_URI not set")
+    listener = CommandAddresses()
+    client = MongoClient(REPLICA_SET_URI, event_listeners=[listener])
+    db = client.test_db
+    db.events.delete_many({})
+    yield db, listener
+    client.close()
+
+
+@pytest.fixture
+def client_on_replica_set(client):
+    if "replicaSet" not in app.config['MONGO_URI']:
+        pytest.skip("app is not connected to a replica set, set TEST_MONGO_URI")
+    yield client
+
+
+def make_token(seconds_from_now=0):
+    timestamp = Timestamp(int(time.time()) + seconds_from_now, 1)
+    session = SimpleNamespace(operation_time=timestamp, cluster_time={"clusterTime": timestamp})
+    return encode_causal_token(session)
+
+
+def test_read_db_routes_by_endpoint():
+    object_id = "0" * 24
+    with app.test_request_context(f'/events/{object_id}/feedback/{object_id}', headers={CAUSAL_TOKEN_HEADER: make_token()}):
+        assert read_db() is secondary_db
+
+    # without a token the client's own writes may be missing on a secondary
+    with app.test_request_context(f'/events/{object_id}/feedback/{object_id}'):
+        assert read_db() is mongo.db
+
+    with app.test_request_context(f'/events/{object_id}/feedback', method='POST'):
+        assert read_db() is mongo.db
+
+
+def test_causal_token_round_trip():
+    token = decode_causal_token(make_token())
+    assert isinstance(token["operation_time"], Timestamp)
+    assert isinstance(token["cluster_time"]["clusterTime"], Timestamp)
+
+
+def test_unsigned_causal_token_is_ignored():
+    forged = {"operation_time": Timestamp(int(time.time()), 1), "cluster_time": None}
+    assert decode_causal_token(base64.urlsafe_b64encode(bson.encode(forged)).decode()) is None
+    assert decode_causal_token(make_token()[:-1] + "x") is None
+
+
+def test_causal_token_with_future_time_is_ignored():
+    assert decode_causal_token(make_token(seconds_from_now=3600)) is None
+
+
+def test_causal_token_with_wrong_types_is_ignored():
+    session = SimpleNamespace(operation_time="yesterday", cluster_time={"clusterTime": 1})
+    assert decode_causal_token(encode_causal_token(session)) is None
+
+
+def test_secondary_preferred_reads_go_to_secondaries(replica_set):
+    db, listener = replica_set
+    db.events.insert_one({"classroom": "A"})
+    secondary = secondary_preferred(db, 90)
+
+    for _ in range(10):
+        secondary.events.find_one({"classroom": "A"})
+
+    primary = db.client.primary
+    assert listener.addresses
+    assert all(address != primary for address in listener.addresses)
+
+
+def test_causal_session_reads_own_write_from_secondary(replica_set):
+    db, _ = replica_set
+    secondary = secondary_preferred(db, 90)
+
+    with db.client.start_session(causal_consistency=True) as session:
+        event_id = db.events.insert_one({"classroom": "A"}, session=session).inserted_id
+        assert secondary.events.find_one({"_id": event_id}, session=session) is not None
+
+
+def test_causal_token_carries_write_into_new_session(replica_set):
+    db, _ = replica_set
+    secondary = secondary_preferred(db, 90)
+
+    with db.client.start_session(causal_consistency=True) as write_session:
+        event_id = db.events.insert_one({"classroom": "A"}, session=write_session).inserted_id
+        token = encode_causal_token(write_session)
+
+    with db.client.start_session(causal_consistency=True) as read_session:
+        advance_session(read_session, decode_causal_token(token))
+        assert secondary.events.find_one({"_id": event_id}, session=read_session) is not None
+
+
+def test_feedback_is_visible_right_after_posting(client_on_replica_set):
+    client = client_on_replica_set
+    event_id = mongo.db.events.insert_one({"classroom": "A", "children_staying_home": []}).inserted_id
+    child_id = mongo.db.children.insert_one({"first_name": "Anna", "event_feedback": []}).inserted_id
+
+    # repeated since a lagging secondary only shows up now and then
+    for _ in range(20):
+        response = client.post(f'/events/{event_id}/feedback', json={'child_id': str(child_id)})
+        token = response.headers[CAUSAL_TOKEN_HEADER]
+        response = client.get(f'/events/{event_id}/feedback/{child_id}', headers={CAUSAL_TOKEN_HEADER: token})
+        assert response.get_json() == {"staying_home": True}
+
+        response = client.post(f'/events/{event_id}/feedback/{child_id}/withdraw')
+        token = response.headers[CAUSAL_TOKEN_HEADER]
+        response = client.get(f'/events/{event_id}/feedback/{child_id}', headers={CAUSAL_TOKEN_HEADER: token})
+        assert response.get_json() == {"staying_home": False}